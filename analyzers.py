@@ -2,28 +2,196 @@
 Модуль для анализа фишинга через VirusTotal и NLP.
 
 Классы:
+    - PersistentCache: Постоянный кэш результатов проверок (SQLite)
     - VirusTotalClient: Проверка URL через VirusTotal API
+    - BatchClassifier: Пакетная обработка одновременных запросов к NLP-модели
     - BaseAnalyzer: Базовый интерфейс для анализаторов сообщений
     - PhishingAnalyzer: Анализ текста и ссылок на фишинг
 
 Требования:
     - Python 3.8+
-    - Библиотеки: requests, transformers
+    - Библиотеки: requests, transformers, tldextract
+    - Необязательно: google-re2 для поиска URL за линейное время,
+      orjson для быстрого разбора ответов VirusTotal
 """
+import os
 import re
+import json
+import time
+import logging
+import queue
 import base64
+import hashlib
+import sqlite3
+import functools
+import threading
+from urllib.parse import urlsplit, urlunsplit
+try:
+    import re2  # google-re2: поиск за линейное время, без бэктрекинга
+except ImportError:
+    re2 = None
+try:
+    import orjson  # быстрый разбор JSON-ответов VirusTotal
+except ImportError:
+    orjson = None
 import requests
+import tldextract
+import torch
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification,  AutoModelForSeq2SeqLM
 from transformers import MarianMTModel, MarianTokenizer
 
 
+logger = logging.getLogger(__name__)
+
+MT_MODEL_NAME = 'Helsinki-NLP/opus-mt-ru-en'
+MT_BATCH_SIZE = 16
+
+VT_CACHE_TTL = 3600          # время жизни отчёта VirusTotal без детектов в кэше, секунды
+VT_MALICIOUS_CACHE_TTL = 86400  # время жизни отчёта с детектами: такие URL редко «исправляются»
+VT_QUEUED_CACHE_TTL = 120    # сколько не отправлять повторно URL, поставленный в очередь анализа
+EXPAND_CACHE_TTL = 86400     # время жизни раскрытого URL в кэше, секунды
+TEXT_CACHE_SIZE = 4096       # число результатов анализа текста в памяти
+TEXT_CACHE_TTL = 7 * 86400   # время жизни результата анализа текста на диске, секунды
+CACHE_PURGE_EVERY = 1000     # через сколько записей в кэш удалять из файла просроченные
+URL_CHECK_WORKERS = 8        # число одновременных проверок URL
+NLP_MAX_BATCH = 16           # максимальный размер пакета для классификатора
+NLP_BATCH_WAIT = 0.02        # сколько ждать других запросов перед запуском пакета, секунды
+NLP_PAD_BUCKET = 8           # размер подпакета из текстов близкой длины (меньше паддинга)
+NLP_MAX_TOKENS = 512         # максимальная длина входа классификатора в токенах
+SHORT_TEXT_WORDS = 20        # короче - текст без ссылок и ключевых слов не проверяется моделью
+CHARS_PER_TOKEN = 8          # символов текста на токен входа (с запасом: токен WordPiece короче)
+CYRILLIC_MIN_SHARE = 0.05    # минимальная доля кириллических букв для запуска перевода
+
+CYRILLIC_RE = re.compile(r'[а-яА-ЯёЁ]')
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# шаблон поиска URL компилируется один раз при импорте модуля; если установлен
+# google-re2, используется его DFA, устойчивый к длинным «мусорным» сообщениям.
+# Совпадение может начинаться только там, где слева нет ASCII-буквы, цифры или «_»:
+# иначе длинная строка без точек (base64, хэш) проверялась бы с каждой позиции -
+# квадратичное время. Кириллица слева не мешает: ссылка, приклеенная к русскому
+# слову («жмиbit.ly/abc»), находится. В RE2 нет ретроспективной проверки, но его \b
+# считается только по ASCII и на первом символе адреса (букве или цифре) равносилен ей
+_URL_START_RE = r'(?<![A-Za-z0-9_])'
+_URL_START_RE2 = r'\b'
+# путь заканчивается на любом пробельном символе, включая неразрывный пробел
+# и пробелы Unicode из писем и HTML: \s в RE2 понимает только ASCII-пробелы
+_URL_PATH_CHAR = '[^\\s\x0b\x1c-\x1f\x85\xa0\u1680\u2000-\u200b\u2028\u2029\u202f\u205f\u3000]'
+_URL_BODY = (
+    r'(?:(?:https?|ftp):\/\/)?'
+    r'(?:www\.)?'
+    r'(?:[a-zA-Z0-9][a-zA-Z0-9-]*\.)+[a-zA-Z]{2,}'
+    r'(?:\/' + _URL_PATH_CHAR + r'*)?'
+)
+URL_RE = re2.compile(_URL_START_RE2 + _URL_BODY) if re2 else re.compile(_URL_START_RE + _URL_BODY)
+
+# начала слов, характерных для фишинговых сообщений (поиск без учёта регистра)
+PHISHING_KEYWORDS = (
+    'password', 'login', 'verify', 'account', 'bank', 'card', 'urgent', 'suspend',
+    'click', 'prize', 'winner', 'payment', 'invoice', 'refund', 'confirm', 'bitcoin',
+    'парол', 'логин', 'подтверд', 'аккаунт', 'учетн', 'учётн', 'банк', 'карт',
+    'срочн', 'заблокир', 'блокировк', 'выигр', 'приз', 'оплат', 'платеж', 'платёж',
+    'возврат', 'код', 'смс', 'кредит', 'бонус', 'подар', 'компенсац', 'выплат',
+)
+SUSPECT_KW_RE = re.compile(r'\b(?:' + '|'.join(PHISHING_KEYWORDS) + ')', re.IGNORECASE)
+
+# строки отчёта по URL: безопасно, подозрительно, опасно, ошибка, отправлен на анализ
+URL_VERDICT_FORMATS = (
+    "    - `{url}`: ✅ Безопасно",
+    "    - `{url}`: 🟡 Подозрительно",
+    "    - `{url}`: 🔴 Опасно",
+    "    - `{url}`: ⚠️ {error}",
+    "    - `{url}`: ⏳ Отправлен на анализ",
+)
+
+# сервисы коротких ссылок: только для них выполняется запрос с переходом по редиректам
+URL_SHORTENERS = frozenset((
+    'bit.ly', 'bitly.com', 'tinyurl.com', 't.co', 'goo.gl', 'is.gd', 'v.gd', 'ow.ly',
+    'buff.ly', 'rebrand.ly', 'cutt.ly', 'shorturl.at', 'rb.gy', 't.ly', 'tiny.cc',
+    'bl.ink', 'lnkd.in', 'soo.gd', 's.id', 'clck.ru', 'vk.cc', 'u.to', 'qps.ru',
+))
+
+# встроенный снимок Public Suffix List, без сетевых запросов и записи кэша на диск
+TLD_EXTRACT = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=())
+
+
+def _bf16_supported() -> bool:
+    """Проверяет, есть ли у процессора аппаратная поддержка bfloat16 (AVX-512-BF16/AMX).
+
+    Returns:
+        bool: True, если bfloat16-умножения матриц выполняются нативно
+    """
+    try:
+        return torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def prepare_model(model):
+    """Готовит загруженную PyTorch-модель к инференсу.
+
+    Переводит модель в режим eval. При NLP_PRECISION=bf16 веса приводятся к bfloat16,
+    если процессор поддерживает его аппаратно: объём читаемых из памяти весов уменьшается вдвое.
+    При NLP_PRECISION=int8 слои nn.Linear заменяются динамически квантованными
+    (INT8-ядра FBGEMM/oneDNN): модель в ~4 раза меньше и быстрее на CPU без новых зависимостей.
+    При NLP_IPEX=1 модель (кроме INT8) оптимизируется Intel Extension for PyTorch, если он
+    установлен: слияние операторов и ядра oneDNN, на процессорах с AMX - ускорение bfloat16.
+    При переменной окружения TORCH_COMPILE=1 метод forward компилируется через torch.compile:
+    это убирает накладные расходы Python на каждую операцию, но первый вызов модели
+    занимает заметно больше времени.
+
+    Args:
+        model (torch.nn.Module): Модель Hugging Face
+
+    Returns:
+        torch.nn.Module: Та же модель, готовая к инференсу
+    """
+    model.eval()
+    if os.getenv('NLP_PRECISION') == 'bf16':
+        if _bf16_supported():
+            torch.set_float32_matmul_precision('medium')
+            model = model.to(torch.bfloat16)
+        else:
+            logger.warning("bfloat16 не поддерживается процессором, модель остаётся в float32")
+    elif os.getenv('NLP_PRECISION') == 'int8':
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if os.getenv('NLP_IPEX') == '1' and os.getenv('NLP_PRECISION') != 'int8':
+        try:
+            import intel_extension_for_pytorch as ipex
+        except ImportError:
+            logger.warning("intel_extension_for_pytorch не установлен, NLP_IPEX игнорируется")
+        else:
+            model = ipex.optimize(model, dtype=next(model.parameters()).dtype)
+    if os.getenv('TORCH_COMPILE') == '1':
+        # компилируем forward, а не всю модель: generate() и pipeline
+        # продолжают работать с исходным объектом модели;
+        # dynamic=True - длина входа меняется от сообщения к сообщению
+        model.forward = torch.compile(model.forward, dynamic=True)
+    return model
+
+
+@functools.lru_cache(maxsize=1)
+def _get_mt():
+    """Загружает токенизатор и модель перевода один раз на процесс.
+
+    Returns:
+        tuple: (MarianTokenizer, MarianMTModel) - модель подготовлена prepare_model
+    """
+    tokenizer = MarianTokenizer.from_pretrained(MT_MODEL_NAME)
+    model = prepare_model(MarianMTModel.from_pretrained(MT_MODEL_NAME))
+    return tokenizer, model
 
 
 def translate_ru_to_en(text):
     """Переводит текст с русского на английский язык с использованием модели Helsinki-NLP/opus-mt-ru-en.
 
     Использует предобученную модель машинного перевода MarianMT от Hugging Face.
-    Текст автоматически разбивается на предложения для улучшения качества перевода.
+    Текст автоматически разбивается на предложения для улучшения качества перевода,
+    предложения переводятся пакетами по MT_BATCH_SIZE за один вызов generate.
 
     Args:
         text (str): Текст на русском языке для перевода. Может содержать несколько предложений.
@@ -36,40 +204,195 @@ def translate_ru_to_en(text):
         RuntimeError: При проблемах с загрузкой модели или токенизатора
 
     Note:
-        - Первый вызов функции может занять время на загрузку модели (300-500MB)
+        - Первый вызов функции может занять время на загрузку модели (300-500MB),
+          последующие вызовы используют уже загруженную модель
     """
-    model_name = 'Helsinki-NLP/opus-mt-ru-en'
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = MarianMTModel.from_pretrained(model_name)
+    tokenizer, model = _get_mt()
+
+    # разбиваем текст на предложения
+    sentences = [s for s in SENTENCE_SPLIT_RE.split(text.strip()) if s]
+
+    # сортируем предложения по длине, чтобы в пакете было меньше паддинга,
+    # переводим пакетами и восстанавливаем исходный порядок
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+    translations = [''] * len(sentences)
+    for start in range(0, len(order), MT_BATCH_SIZE):
+        chunk = order[start:start + MT_BATCH_SIZE]
+        batch = tokenizer([sentences[i] for i in chunk], return_tensors="pt",
+                          truncation=True, padding=True)
+        # жадное декодирование с KV-кэшем: для классификации достаточно перевода
+        # по смыслу, а beam search многократно прогоняет декодер на каждом шаге;
+        # перевод редко длиннее оригинала более чем на треть
+        max_new_tokens = min(256, int(batch['input_ids'].shape[1] * 1.3) + 8)
+        with torch.inference_mode():
+            gen = model.generate(**batch, num_beams=1, do_sample=False, use_cache=True,
+                                 max_new_tokens=max_new_tokens)
+        translated = tokenizer.batch_decode(gen, skip_special_tokens=True)
+        for i, sentence in zip(chunk, translated):
+            translations[i] = sentence
 
+    return " ".join(translations)
 
-    # разбиваем текст на предложенияим
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+def canonical_url(url: str) -> str:
+    """Приводит URL к каноническому виду для ключа кэша.
 
-    # переводим каждое предложение по отдельности и склеиваем обратно
-    translations = []
-    for sentence in sentences:
-        if sentence:
-            batch = tokenizer([sentence], return_tensors="pt", truncation=True, padding=True)
-            gen = model.generate(**batch)
-            translated = tokenizer.batch_decode(gen, skip_special_tokens=True)
-            translations.append(translated[0])
+    Схема и домен переводятся в нижний регистр, фрагмент (#...) отбрасывается -
+    на сервер он не передаётся и на вердикт не влияет.
+
+    Args:
+        url (str): Исходный URL
+
+    Returns:
+        str: Канонический URL
+    """
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/',
+                       parts.query, ''))
+
+@functools.lru_cache(maxsize=8192)
+def vt_url_id(url: str) -> str:
+    """Вычисляет идентификатор URL для VirusTotal API v3.
+
+    Идентификатор - base64url от URL без завершающих символов '='.
+    Паддинг отрезается ещё у байтовой строки, до декодирования в str.
+    Результаты для недавних URL запоминаются.
+
+    Args:
+        url (str): Проверяемый URL
+
+    Returns:
+        str: Идентификатор URL
+    """
+    return base64.urlsafe_b64encode(url.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+
+class PersistentCache:
+    """Постоянный кэш с ограниченным временем жизни записей на основе SQLite.
+
+    Значения хранятся в виде JSON и переживают перезапуск бота. Последние записи
+    дополнительно держатся в памяти (LRU), чтобы повторные обращения не шли в SQLite.
+    Доступ защищён блокировкой, поэтому кэш можно использовать из нескольких потоков.
+    Просроченные записи удаляются из файла при открытии и после каждых
+    CACHE_PURGE_EVERY записей, поэтому файл не растёт бесконечно.
+    """
+    def __init__(self, path: str, memory_size: int = 4096):
+        """Открывает (или создаёт) файл кэша.
+
+        Args:
+            path (str): Путь к файлу базы SQLite
+            memory_size (int): Число записей, хранимых в памяти
+        """
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_size = memory_size
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+            self._purge_expired()
+
+    def _purge_expired(self) -> None:
+        """Удаляет из файла все просроченные записи (вызывается под блокировкой)."""
+        self._conn.execute('DELETE FROM cache WHERE expires < ?', (time.time(),))
+
+    def _remember(self, key: str, value, expires: float) -> None:
+        """Кладёт запись в LRU в памяти, вытесняя самую старую (вызывается под блокировкой)."""
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Возвращает значение по ключу.
+
+        Args:
+            key (str): Ключ записи
+
+        Returns:
+            Сохранённое значение или None, если записи нет или её срок истёк
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+
+            row = self._conn.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                with self._conn:
+                    self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return None
+            value = orjson.loads(row[0]) if orjson else json.loads(row[0])
+            self._remember(key, value, row[1])
+        return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        """Сохраняет значение в кэш.
+
+        Args:
+            key (str): Ключ записи
+            value: Значение, сериализуемое в JSON
+            ttl (float): Время жизни записи в секундах
+        """
+        expires = time.time() + ttl
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                (key, json.dumps(value), expires)
+            )
+            self._writes += 1
+            if self._writes % CACHE_PURGE_EVERY == 0:
+                self._purge_expired()
+            self._remember(key, value, expires)
 
-    return " ".join(translations)
 
 class VirusTotalClient:
     """Клиент для работы с VirusTotal API.
     
     Предоставляет методы для проверки URL через VirusTotal.
+    Результаты проверок и раскрытия URL кэшируются на диске.
     """     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_path: str = '.vt_cache.sqlite3'):
         """Инициализирует клиент VirusTotal.
 
         Args:
             api_key (str): API-ключ для доступа к VirusTotal API
+            cache_path (str): Путь к файлу кэша результатов (None - без кэширования)
         """           
         self.api_key = api_key
         self.headers = {'x-apikey': self.api_key}
+        self._cache = PersistentCache(cache_path) if cache_path else None
+        # запросы к VirusTotal, выполняющиеся прямо сейчас: повторная проверка того же URL
+        # (например, две короткие ссылки на один адрес) ждёт первую, а не идёт в API
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        # постоянные соединения с virustotal.com: TLS-рукопожатие выполняется один раз,
+        # временные ошибки сервера повторяются с экспоненциальной задержкой
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504],
+                        raise_on_status=False)
+        self._session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                                                    max_retries=retries))
+
+        # отдельная сессия для раскрытия ссылок, чтобы API-ключ не уходил на сторонние сайты
+        self._expand_session = requests.Session()
+        self._expand_session.headers['User-Agent'] = 'Mozilla/5.0'
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+        self._expand_session.mount('http://', adapter)
+        self._expand_session.mount('https://', adapter)
 
     def _handle_api_error(self, response, url: str) -> dict:
         """Обрабатывает ошибки API VirusTotal (внутренний метод).
@@ -83,7 +406,7 @@ class VirusTotalClient:
         """          
         if response.status_code == 404:
             scan_url = 'https://www.virustotal.com/api/v3/urls'
-            resp = requests.post(scan_url, headers=self.headers, data={'url': url})
+            resp = self._session.post(scan_url, data={'url': url}, timeout=10)
             if resp.status_code == 200:
                 return {
                     'status': 'queued',
@@ -97,6 +420,8 @@ class VirusTotalClient:
     def check_url(self, url: str) -> dict:
         """Проверяет URL через VirusTotal API.
 
+        Одновременные проверки одного и того же URL выполняют один запрос к API.
+
         Args:
             url (str): URL для проверки
 
@@ -107,25 +432,77 @@ class VirusTotalClient:
                 - harmless (int): Число безопасных детектов
                 - error (str): Сообщение об ошибке (при наличии)
         """
+        key = f'vt:{vt_url_id(canonical_url(url))}'
+        if self._cache:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return dict(pending.result())
+
+        try:
+            # предыдущий владелец мог записать кэш и снять запрос между первой
+            # проверкой кэша и захватом блокировки: повторный запрос к API не нужен
+            result = self._cache.get(key) if self._cache else None
+            if result is None:
+                result = self._fetch_report(url, key)
+            pending.set_result(result)
+            # владелец получает копию, как и ожидающие: общий словарь не должен
+            # меняться вызывающим кодом
+            return dict(result)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _fetch_report(self, url: str, key: str) -> dict:
+        """Запрашивает отчёт о URL у VirusTotal и кэширует успешный результат (внутренний метод).
+
+        Args:
+            url (str): URL для проверки
+            key (str): Ключ кэша для этого URL
+
+        Returns:
+            dict: Результат проверки в формате check_url
+        """
         try:
-            encoded = base64.urlsafe_b64encode(url.encode()).decode().rstrip("=")
-            api_url = f'https://www.virustotal.com/api/v3/urls/{encoded}'
-            resp = requests.get(api_url, headers=self.headers, timeout=10)
+            api_url = f'https://www.virustotal.com/api/v3/urls/{vt_url_id(url)}'
+            resp = self._session.get(api_url, timeout=10)
 
             if resp.status_code == 200:
                 stats = (
-                    resp.json()
+                    (orjson.loads(resp.content) if orjson else resp.json())
                     .get('data', {})
                     .get('attributes', {})
                     .get('last_analysis_stats', {})
                 )
-                return {
+                result = {
                     'malicious': stats.get('malicious', 0),
                     'suspicious': stats.get('suspicious', 0),
                     'harmless': stats.get('harmless', 0),
                 }
-
-            return self._handle_api_error(resp, url)
+                if self._cache:
+                    flagged = result['malicious'] or result['suspicious']
+                    self._cache.set(key, result,
+                                    VT_MALICIOUS_CACHE_TTL if flagged else VT_CACHE_TTL)
+                return result
+
+            result = self._handle_api_error(resp, url)
+            if self._cache and result.get('status') == 'queued':
+                # анализ занимает около минуты: до его окончания повторная
+                # проверка вернула бы 404 и отправила бы URL ещё раз
+                self._cache.set(key, result, VT_QUEUED_CACHE_TTL)
+            return result
 
         except requests.exceptions.RequestException as e:
             return {'error': f"Ошибка сети: {e}"}
@@ -135,8 +512,10 @@ class VirusTotalClient:
     def expand_url(self, url: str) -> str:
         """Раскрывает сокращённые URL, возвращая конечный адрес после всех редиректов.
 
-        Метод выполняет HTTP-запрос по указанному URL и отслеживает цепочку перенаправлений,
-        возвращая итоговый URL.
+        Для ссылок на сервисы из URL_SHORTENERS метод выполняет HEAD-запрос и отслеживает
+        цепочку перенаправлений, возвращая итоговый URL; остальные ссылки возвращаются
+        без сетевых запросов. Тело ответа не загружается; если сервер не поддерживает HEAD,
+        выполняется потоковый GET, который закрывается сразу после получения заголовков.
 
         Args:
             url (str): URL для раскрытия. 
@@ -152,15 +531,120 @@ class VirusTotalClient:
         """
         full_url = url if url.startswith(('http://', 'https://', 'ftp://')) \
             else f'http://{url}'
+        host = (urlsplit(full_url).hostname or '').lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        if host not in URL_SHORTENERS:
+            return full_url
+
+        key = f'expand:{full_url}'
+        if self._cache:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
         try:
-            response = requests.get(full_url, allow_redirects=True, timeout=7,
-                                    headers={'User-Agent': 'Mozilla/5.0'})
+            response = self._expand_session.head(full_url, allow_redirects=True, timeout=7)
+            if response.status_code in (405, 501):
+                response = self._expand_session.get(full_url, allow_redirects=True, timeout=7,
+                                                    stream=True)
+                response.close()
+            if self._cache:
+                self._cache.set(key, response.url, EXPAND_CACHE_TTL)
             return response.url
         except Exception:
             return full_url  # если не удалось, вернём как есть
 
 
 
+class BatchClassifier:
+    """Объединяет одновременные запросы к классификатору в пакеты.
+
+    Обработчики бота выполняются в разных потоках: каждый вызов ставит текст в очередь
+    и ждёт результата, а фоновый поток собирает до max_batch текстов, пришедших
+    в течение max_wait секунд, и выполняет для них один прямой проход модели.
+    Вызов возвращает список из одного результата, как pipeline для одной строки.
+
+    Модель загружается лениво, при первом запросе на классификацию: бот, который
+    отвечает только на /start или тест, не тратит память на веса модели.
+    """
+    def __init__(self, loader, max_batch: int = NLP_MAX_BATCH,
+                 max_wait: float = NLP_BATCH_WAIT, max_length: int = NLP_MAX_TOKENS):
+        """Запускает фоновый поток обработки пакетов.
+
+        Args:
+            loader: Функция без аргументов, возвращающая пайплайн text-classification
+                Hugging Face или None, если модель загрузить не удалось
+            max_batch (int): Максимальный размер пакета
+            max_wait (float): Время ожидания других запросов в секундах
+            max_length (int): Максимальная длина входа в токенах, остальное отбрасывается
+                токенизатором (стоимость self-attention растёт квадратично с длиной)
+        """
+        self._loader = loader
+        self.nlp = None
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_length = max_length
+        self._queue = queue.Queue()
+        threading.Thread(target=self._worker, name='nlp-batcher', daemon=True).start()
+
+    def __call__(self, text: str) -> list:
+        """Классифицирует текст, дожидаясь обработки пакета, в который он попал.
+
+        Args:
+            text (str): Текст для классификации
+
+        Returns:
+            list: Список из одного словаря с ключами label и score
+        """
+        future = Future()
+        self._queue.put((text, future))
+        return [future.result()]
+
+    def _collect_batch(self) -> list:
+        """Ждёт первый запрос и добирает к нему другие в пределах max_wait (внутренний метод).
+
+        Returns:
+            list: Пары (текст, Future)
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self) -> None:
+        """Цикл фонового потока: классифицирует пакеты и возвращает результаты ожидающим вызовам."""
+        while True:
+            batch = self._collect_batch()
+            # тексты близкой длины попадают в один подпакет и дополняются
+            # паддингом только до самого длинного из них, а не из всего пакета
+            order = sorted(range(len(batch)), key=lambda i: len(batch[i][0]))
+            texts = [batch[i][0] for i in order]
+            try:
+                if self.nlp is None:
+                    self.nlp = self._loader()
+                    if self.nlp is None:
+                        raise RuntimeError('Модель не загружена')
+                    # длинный вход вызвал бы ошибку индекса и провалил весь пакет
+                    self.max_length = min(self.max_length, self.nlp.tokenizer.model_max_length)
+                with torch.inference_mode():
+                    results = self.nlp(texts, batch_size=min(len(texts), NLP_PAD_BUCKET),
+                                       truncation=True, max_length=self.max_length)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for i, result in zip(order, results):
+                batch[i][1].set_result(result)
+
+
 class BaseAnalyzer:
     """Базовый класс для анализаторов сообщений.
     
@@ -188,53 +672,167 @@ class PhishingAnalyzer(BaseAnalyzer):
     
     Совмещает анализ текста через NLP и проверку URL через VirusTotal.
     """  
-    def __init__(self, vt_client: VirusTotalClient, nlp_pipeline=None, tokenizer=None):
+    def __init__(self, vt_client: VirusTotalClient, nlp_pipeline=None, tokenizer=None,
+                 multilingual: bool = False, verdict_cache: PersistentCache = None,
+                 cache_namespace: str = '', max_text_chars: int = NLP_MAX_TOKENS * CHARS_PER_TOKEN):
         """Инициализирует анализатор фишинговых сообщений.
 
         Args:
             vt_client (VirusTotalClient): Клиент для проверки URL
             nlp_pipeline: NLP-модель для анализа текста (по умолчанию None)
             tokenizer: Токенизатор для NLP-модели (по умолчанию None)
+            multilingual (bool): Модель понимает русский текст, перевод не нужен (по умолчанию False)
+            verdict_cache (PersistentCache): Постоянный кэш результатов анализа текста,
+                переживающий перезапуск (по умолчанию None - только кэш в памяти)
+            cache_namespace (str): Отпечаток конфигурации модели (имя, бэкенд, точность,
+                перевод, длина входа); входит в ключ постоянного кэша, чтобы после
+                смены любой из настроек не использовались старые оценки
+            max_text_chars (int): Сколько первых символов текста переводить и классифицировать;
+                остальное модель всё равно отбросит при усечении до max_length токенов
+                (по умолчанию NLP_MAX_TOKENS * CHARS_PER_TOKEN)
         """       
         self.vt_client = vt_client
         self.nlp = nlp_pipeline
         self.tokenizer = tokenizer
+        self.multilingual = multilingual
+        self._verdict_cache = verdict_cache
+        self._cache_namespace = cache_namespace
+        self.max_text_chars = max_text_chars
+        self._verdicts = OrderedDict()
+        self._verdicts_lock = threading.Lock()
+        # пул создаётся один раз и используется всеми сообщениями
+        self._url_executor = ThreadPoolExecutor(max_workers=URL_CHECK_WORKERS,
+                                                thread_name_prefix='url-check')
+
+    def _fingerprint(self, text: str) -> bytes:
+        """Вычисляет отпечаток текста для кэша результатов анализа.
+
+        Учитываются только первые max_text_chars символов - остальное модель не видит,
+        поэтому длинные рассылки с общим началом получают один результат, а время
+        хэширования не зависит от длины сообщения. Пробельные символы нормализуются:
+        токенизатор их всё равно не различает.
 
+        Args:
+            text (str): Текст сообщения
+
+        Returns:
+            bytes: 16-байтовый хэш BLAKE2b
+        """
+        normalized = ' '.join(text[:self.max_text_chars].split())
+        return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+    def analyze_text(self, text: str) -> dict:
         """Анализирует текст на признаки фишинга.
 
+        Короткие тексты без ссылок и ключевых слов фишинга сразу считаются безопасными,
+        а результаты для уже встречавшихся текстов берутся из LRU-кэша в памяти
+        или из постоянного кэша - в обоих случаях без перевода и запуска модели.
+
         Args:
             text (str): Текст для анализа
 
         Returns:
             dict: Результат анализа с меткой и уверенностью
         """               
+        if self._is_trivial_text(text):
+            return {'label': 'safe', 'score': 0.0}
+
+        key = self._fingerprint(text)
+        with self._verdicts_lock:
+            cached = self._verdicts.get(key)
+            if cached is not None:
+                self._verdicts.move_to_end(key)
+                return dict(cached)
+
+        persistent_key = f'nlp:{self._cache_namespace}:{key.hex()}'
+        if self._verdict_cache:
+            cached = self._verdict_cache.get(persistent_key)
+            if cached is not None:
+                self._remember_verdict(key, cached)
+                return dict(cached)
+
+        result = self._classify_text(text)
+        if not result.get('error'):
+            self._remember_verdict(key, result)
+            if self._verdict_cache:
+                self._verdict_cache.set(persistent_key, result, TEXT_CACHE_TTL)
+        return dict(result)
+
+    def _remember_verdict(self, key: bytes, result: dict) -> None:
+        """Сохраняет результат анализа в LRU-кэш в памяти (внутренний метод).
 
-    def analyze_text(self, text: str) -> dict:
-        """Анализирует текст на признаки фишинга.
+        Args:
+            key (bytes): Отпечаток текста
+            result (dict): Результат анализа
+        """
+        with self._verdicts_lock:
+            self._verdicts[key] = result
+            self._verdicts.move_to_end(key)
+            if len(self._verdicts) > TEXT_CACHE_SIZE:
+                self._verdicts.popitem(last=False)
+
+    @staticmethod
+    def _needs_translation(text: str) -> bool:
+        """Проверяет, достаточно ли в тексте кириллицы, чтобы его переводить.
+
+        Отдельные русские слова (подпись, футер) в английском тексте не требуют
+        дорогого перевода всего сообщения.
+
+        Args:
+            text (str): Текст сообщения
+
+        Returns:
+            bool: True, если доля кириллических букв не меньше CYRILLIC_MIN_SHARE
+        """
+        cyrillic = len(CYRILLIC_RE.findall(text))
+        if not cyrillic:
+            return False
+        letters = sum(ch.isalpha() for ch in text)
+        return cyrillic / letters >= CYRILLIC_MIN_SHARE
+
+    @staticmethod
+    def _is_trivial_text(text: str) -> bool:
+        """Проверяет, можно ли не запускать модель для текста без ссылок.
+
+        Args:
+            text (str): Текст сообщения
+
+        Returns:
+            bool: True, если текст короче SHORT_TEXT_WORDS слов и не содержит
+                ни ключевых слов фишинга, ни ссылок
+        """
+        # split с ограничением не строит список всех слов длинного сообщения
+        return (len(text.split(None, SHORT_TEXT_WORDS - 1)) < SHORT_TEXT_WORDS
+                and not SUSPECT_KW_RE.search(text)
+                and not URL_RE.search(text))
+
+    def _classify_text(self, text: str) -> dict:
+        """Переводит текст при необходимости и классифицирует его NLP-моделью (внутренний метод).
 
         Args:
             text (str): Текст для анализа
 
         Returns:
             dict: Результат анализа с меткой и уверенностью
-        """               
+        """
         if not self.nlp:
             return {'error': 'Модель не загружена'}
-        
-        # Если в тексте есть кириллица, перевести его на английский
-        if re.search(r'[а-яА-Я]', text):
+
+        text = text[:self.max_text_chars]
+
+        # Если текст в основном на русском, перевести его на английский
+        if not self.multilingual and self._needs_translation(text):
             try:
-                print("подаем:", text)
+                logger.debug("Перевод: %s", text)
                 text = translate_ru_to_en(text)
-                print(text) #test
+                logger.debug("Результат перевода: %s", text)
             except Exception as e:
                 return {'error': f"Ошибка перевода: {e}"}
 
 
         try:
-            
             result = self.nlp(text)[0]
-            print(result)
+            logger.debug("Результат NLP: %s", result)
             return {
                 'label': 'phishing' if result['label'] == 'phishing' else 'safe',
                 'score': result['score'],
@@ -245,19 +843,18 @@ class PhishingAnalyzer(BaseAnalyzer):
     def extract_urls(self, text: str) -> list:
         """Извлекает URL из текста.
 
+        Строки вида ``file.txt``, у которых последняя часть не является публичным
+        доменным суффиксом, отбрасываются, чтобы не проверять их через VirusTotal.
+        Повторяющиеся URL возвращаются один раз, в порядке первого появления.
+
         Args:
             text (str): Текст для поиска URL
 
         Returns:
-            list: Список найденных URL
+            list: Список найденных URL без повторов
         """   
-        return re.findall(
-            r'(?:(?:https?|ftp):\/\/)?'
-            r'(?:www\.)?'
-            r'(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}'
-            r'(?:\/[^\s]*)?',
-            text
-        )
+        candidates = dict.fromkeys(URL_RE.findall(text))
+        return [url for url in candidates if TLD_EXTRACT(url).suffix]
     
     def format_url_result(self, url: str, result: dict) -> str:
         """
@@ -270,15 +867,17 @@ class PhishingAnalyzer(BaseAnalyzer):
         Returns:
             str: Cтрока с оценкой URL (Опасно, Подозрительно, Безопасно).
     """
-        if result.get('error'):
-            return f"    - `{url}`: ⚠️ {result['error']}"
-        if result.get('status') == 'queued':
-            return f"    - `{url}`: ⏳ Отправлен на анализ"
-        if result.get('malicious', 0) > 1 or result.get('suspicious', 0) > 1:
-            return f"    - `{url}`: 🔴 Опасно"
-        if result.get('malicious', 0) > 0 or result.get('suspicious', 0) > 0:
-            return f"    - `{url}`: 🟡 Подозрительно"
-        return f"    - `{url}`: ✅ Безопасно"
+        error = result.get('error')
+        if error:
+            verdict = 3
+        elif result.get('status') == 'queued':
+            verdict = 4
+        else:
+            malicious = result.get('malicious', 0)
+            suspicious = result.get('suspicious', 0)
+            verdict = 2 if malicious > 1 or suspicious > 1 else \
+                1 if malicious > 0 or suspicious > 0 else 0
+        return URL_VERDICT_FORMATS[verdict].format(url=url, error=error)
 
     def _check_url_risk(self, url: str) -> str:
         """
@@ -298,9 +897,27 @@ class PhishingAnalyzer(BaseAnalyzer):
             return f"    - `{url}`: ⚠️ Ошибка ({type(e).__name__})"
 
 
+    def _submit_url_checks(self, urls: list) -> list:
+        """
+        Запускает проверку нескольких URL в пуле потоков анализатора и сразу возвращает управление.
+
+        Ожидание сети отпускает GIL, поэтому время проверки сообщения определяется
+        самым медленным URL, а не суммой задержек.
+
+        Args:
+            urls (list): URL, извлечённые из текста сообщения.
+
+        Returns:
+            list: Объекты Future с отформатированными строками в порядке исходного списка.
+    """
+        return [self._url_executor.submit(self._check_url_risk, url) for url in urls]
+
     def analyze_message(self, text: str) -> list:
         """Анализирует сообщение на фишинг.
 
+        Проверка ссылок идёт в фоне, пока в текущем потоке анализируется текст,
+        поэтому время ответа - максимум из двух проверок, а не их сумма.
+
         Args:
             text (str): Текст сообщения для анализа
 
@@ -310,16 +927,17 @@ class PhishingAnalyzer(BaseAnalyzer):
         report = []
 
         urls = self.extract_urls(text)
+        url_checks = self._submit_url_checks(urls)
+
+        result = self.analyze_text(text)
+
         if urls:
             report.append("🔎 Анализ ссылок:")
-            for url in urls:
-                report.append(self._check_url_risk(url))
+            report.extend(check.result() for check in url_checks)
         else:
             report.append("ℹ️ Ссылки не найдены.")
 
         report.append("\n📝 Анализ текста:")
-        result = self.analyze_text(text)
-
         if result.get('error'):
             report.append(f"    - Ошибка анализа текста: {result['error']}")
         elif result['label'] == 'phishing' and result['score'] > 0.5:
@@ -11,6 +11,31 @@
 - API_TOKEN: Токен Telegram бота
 - VIRUSTOTAL_API_KEY: Ключ для VirusTotal API
 
+Необязательные переменные окружения:
+- TORCH_COMPILE: 1 - компилировать модели через torch.compile при загрузке
+- NLP_BACKEND: torch (по умолчанию) или onnx - классификатор в ONNX Runtime
+- NLP_PRECISION: точность весов; для torch: fp32 (по умолчанию), bf16 или int8,
+  для onnx: int8 (по умолчанию), fp16 или fp32
+- ONNX_DIR: Каталог для экспортированных ONNX-моделей (по умолчанию onnx_models)
+- NLP_MODEL: Модель классификатора на Hugging Face Hub (по умолчанию ealvaradob/bert-finetuned-phishing)
+- NLP_MULTILINGUAL: 1 - модель понимает русский язык, перевод сообщений отключается
+- BOT_THREADS: Число потоков для обработки сообщений (по умолчанию 8)
+- NLP_MAX_TOKENS: Максимальная длина текста для классификатора в токенах (по умолчанию 512);
+  для коротких сообщений и маленьких моделей достаточно 64-128, при этом
+  переводится и классифицируется пропорционально меньше текста
+- NLP_IPEX: 1 - оптимизировать PyTorch-модели через Intel Extension for PyTorch
+  (если установлен; модель выполняется на CPU)
+- TORCH_THREADS: Число потоков PyTorch для одного прямого прохода (по умолчанию - все ядра);
+  задаёт и OMP_NUM_THREADS/MKL_NUM_THREADS, если они не заданы
+- ORT_THREADS: Число потоков ONNX Runtime для одного прямого прохода
+  (по умолчанию - число физических ядер)
+- LOG_LEVEL: Уровень журнала (по умолчанию INFO; DEBUG - подробности по каждому сообщению)
+- WEBHOOK_URL: Публичный HTTPS-адрес бота; если задан, обновления принимаются
+  через webhook (Flask) вместо long polling
+- WEBHOOK_PORT: Порт HTTP-сервера для webhook (по умолчанию 8080)
+- WEBHOOK_SECRET: Секрет, который Telegram передаёт в заголовке каждого запроса
+  (обязателен, если задан WEBHOOK_URL)
+
 Используемые технологии:
 - Python-telegram-bot для работы с Telegram API
 - Transformers для NLP анализа
@@ -22,19 +47,39 @@ Raises:
 """
 import os
 import re
+import hmac
+import atexit
+import logging
+import logging.handlers
+import queue
+import platform
+import threading
+import functools
 import base64
 import requests
 from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+
+# загрузка переменных окружения: до импорта torch, чтобы настройки потоков из .env
+# успели попасть в OpenMP/MKL
+load_dotenv()
+
+# пулы потоков OpenMP/MKL создаются при загрузке torch и читают эти переменные
+# только один раз, поэтому TORCH_THREADS переносится в них до импорта
+if os.getenv("TORCH_THREADS"):
+    os.environ.setdefault("OMP_NUM_THREADS", os.environ["TORCH_THREADS"])
+    os.environ.setdefault("MKL_NUM_THREADS", os.environ["TORCH_THREADS"])
+
+import torch
 import telebot
 from telebot import types
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from safe_test import init_safety_test_handlers
-from analyzers import VirusTotalClient, PhishingAnalyzer, BaseAnalyzer
+from analyzers import (VirusTotalClient, PhishingAnalyzer, BaseAnalyzer, BatchClassifier,
+                       PersistentCache, prepare_model, CHARS_PER_TOKEN)
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification,  AutoModelForSeq2SeqLM
 
-# загрузка переменных окружения
-load_dotenv()
 API_TOKEN = os.getenv("API_TOKEN")
 VIRUSTOTAL_API_KEY = os.getenv("VIRUSTOTAL_API_KEY")
 
@@ -42,9 +87,175 @@ if not API_TOKEN or not VIRUSTOTAL_API_KEY:
     raise ValueError("Отсутствуют необходимые переменные окружения")
 
 
+def setup_logging(level: str = "INFO") -> None:
+    """Настраивает журнал: записи передаются через очередь в отдельный поток.
+
+    Обработчики сообщений только кладут запись в очередь, а вывод в stderr
+    выполняет QueueListener, поэтому медленный терминал не задерживает ответы.
+
+    Args:
+        level (str): Уровень журнала (по умолчанию INFO)
+    """
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(
+        "%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level.upper())
+
+    # telebot при импорте вешает на свой логгер собственный StreamHandler и при
+    # этом передаёт записи корневому: без его удаления каждая строка выводится
+    # дважды, причём один раз синхронно из потока обработчика
+    for handler in list(telebot.logger.handlers):
+        telebot.logger.removeHandler(handler)
+
+
+setup_logging(os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
+NLP_MODEL_NAME = os.getenv("NLP_MODEL", "ealvaradob/bert-finetuned-phishing")
+NLP_MULTILINGUAL = os.getenv("NLP_MULTILINGUAL") == "1"
+NLP_MAX_TOKENS = int(os.getenv("NLP_MAX_TOKENS", "512"))
+BOT_THREADS = int(os.getenv("BOT_THREADS", "8"))
+ONNX_DIR = os.getenv("ONNX_DIR", "onnx_models")
+NLP_BACKEND = "onnx" if os.getenv("NLP_BACKEND") == "onnx" else "torch"
+# все настройки, от которых зависит оценка классификатора: при смене любой из них
+# результаты из постоянного кэша прежней конфигурации не используются
+NLP_CONFIG_KEY = "|".join((
+    NLP_MODEL_NAME,
+    NLP_BACKEND,
+    os.getenv("NLP_PRECISION", "int8" if NLP_BACKEND == "onnx" else "fp32"),
+    "ipex" if os.getenv("NLP_IPEX") == "1" else "",
+    "multilingual" if NLP_MULTILINGUAL else "translated",
+    str(NLP_MAX_TOKENS),
+))
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_PATH = "/webhook"
+
+if WEBHOOK_URL and not WEBHOOK_SECRET:
+    raise ValueError("Для режима webhook необходимо задать WEBHOOK_SECRET")
+# бот обрабатывает только сообщения; остальные типы обновлений Telegram не присылает
+ALLOWED_UPDATES = ["message"]
+
+# по умолчанию PyTorch занимает все ядра на каждый прямой проход; для небольшой
+# модели и нескольких потоков-обработчиков это приводит к переподписке процессора
+if os.getenv("TORCH_THREADS"):
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS")))
+    torch.set_num_interop_threads(1)
+
+
+def detect_quantization_target() -> str:
+    """Определяет набор инструкций процессора для INT8-квантования.
+
+    Returns:
+        str: arm64, avx512_vnni, avx512 или avx2
+    """
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            flags = cpuinfo.read()
+    except OSError:
+        flags = ""
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512" in flags:
+        return "avx512"
+    return "avx2"
+
+
+def _ort_session_options():
+    """Создаёт настройки сессии ONNX Runtime для классификатора.
+
+    Включаются все оптимизации графа; запросы приходят пакетами из одного потока,
+    поэтому параллелизм между операторами отключён, а число потоков внутри
+    оператора можно ограничить переменной ORT_THREADS.
+
+    Returns:
+        onnxruntime.SessionOptions: Настройки сессии
+    """
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    options.inter_op_num_threads = 1
+    if os.getenv("ORT_THREADS"):
+        options.intra_op_num_threads = int(os.getenv("ORT_THREADS"))
+    return options
+
+
+def load_onnx_model(model_name: str, precision: str = "int8"):
+    """Загружает классификатор в ONNX Runtime.
+
+    При первом запуске модель экспортируется в ONNX, оптимизируется и сохраняется в ONNX_DIR;
+    последующие запуски загружают готовый файл без повторного экспорта.
+
+    Режимы точности:
+        - int8: динамическое квантование весов под набор инструкций текущего процессора
+        - fp16: слияние операторов (LayerNorm, Attention) и перевод весов в float16,
+          выполняется на CUDAExecutionProvider
+        - fp32: только слияние операторов, без изменения весов и оценок модели
+
+    Args:
+        model_name (str): Имя модели на Hugging Face Hub
+        precision (str): int8, fp16 или fp32 (по умолчанию int8)
+
+    Returns:
+        ORTModelForSequenceClassification: Модель, совместимая с pipeline
+
+    Raises:
+        ImportError: Если не установлен пакет optimum[onnxruntime]
+    """
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTOptimizer, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig, OptimizationConfig
+
+    base_name = model_name.replace('/', '__')
+    if precision == "fp16" and "CUDAExecutionProvider" not in onnxruntime.get_available_providers():
+        logger.warning("float16 в ONNX Runtime требует CUDA, используется fp32")
+        precision = "fp32"
+
+    if precision == "int8":
+        target = detect_quantization_target()
+        save_dir = os.path.join(ONNX_DIR, f"{base_name}-int8-{target}")
+        if not os.path.isdir(save_dir):
+            ort_model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            quantizer = ORTQuantizer.from_pretrained(ort_model)
+            quantization_config = getattr(AutoQuantizationConfig, target)(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=save_dir, quantization_config=quantization_config)
+        return ORTModelForSequenceClassification.from_pretrained(
+            save_dir, file_name="model_quantized.onnx", session_options=_ort_session_options()
+        )
+
+    use_gpu = precision == "fp16"
+    save_dir = os.path.join(ONNX_DIR, f"{base_name}-{precision}")
+    if not os.path.isdir(save_dir):
+        ort_model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        optimizer = ORTOptimizer.from_pretrained(ort_model)
+        optimization_config = OptimizationConfig(optimization_level=99 if use_gpu else 2,
+                                                 fp16=use_gpu, optimize_for_gpu=use_gpu)
+        optimizer.optimize(save_dir=save_dir, optimization_config=optimization_config)
+    return ORTModelForSequenceClassification.from_pretrained(
+        save_dir, file_name="model_optimized.onnx",
+        provider="CUDAExecutionProvider" if use_gpu else "CPUExecutionProvider",
+        session_options=_ort_session_options()
+    )
+
+
+@functools.lru_cache(maxsize=1)
 def load_nlp_model():
     """Загружает и инициализирует NLP модель для детекции спама/фишинга.
 
+    Модель загружается один раз на процесс, повторные вызовы возвращают те же объекты.
+
     Returns:
         tuple: (nlp_pipeline, tokenizer) - пайплайн обработки текста и токенизатор
         или (None, None) в случае ошибки
@@ -53,34 +264,114 @@ def load_nlp_model():
         Exception: При ошибках загрузки модели или токенизатора
     """   
     try:
-        tokenizer = AutoTokenizer.from_pretrained("ealvaradob/bert-finetuned-phishing")
-        model = AutoModelForSequenceClassification.from_pretrained("ealvaradob/bert-finetuned-phishing")
-        nlp = pipeline("text-classification", model=model, tokenizer=tokenizer)
+        tokenizer = AutoTokenizer.from_pretrained(NLP_MODEL_NAME)
+        # предел длины хранится в самом токенизаторе: любой вызов с truncation=True
+        # обрезает вход до NLP_MAX_TOKENS без передачи max_length; больше, чем позволяют
+        # позиционные эмбеддинги модели, предел быть не может
+        tokenizer.model_max_length = min(NLP_MAX_TOKENS, tokenizer.model_max_length)
+        if NLP_BACKEND == "onnx":
+            try:
+                precision = os.getenv("NLP_PRECISION", "int8")
+                model = load_onnx_model(NLP_MODEL_NAME, precision if precision in ("fp16", "fp32") else "int8")
+                return pipeline("text-classification", model=model, tokenizer=tokenizer), tokenizer
+            except ImportError:
+                logger.warning("optimum[onnxruntime] не установлен, используется PyTorch")
+        model = AutoModelForSequenceClassification.from_pretrained(NLP_MODEL_NAME)
+        model = prepare_model(model)
+        # динамически квантованные INT8-слои и модели IPEX работают только на CPU
+        use_gpu = torch.cuda.is_available() and os.getenv("NLP_PRECISION") != "int8" \
+            and os.getenv("NLP_IPEX") != "1"
+        nlp = pipeline("text-classification", model=model, tokenizer=tokenizer,
+                       framework="pt", device=0 if use_gpu else -1)
+        if os.getenv("TORCH_COMPILE") == "1":
+            nlp("warmup")  # компиляция выполняется при первом вызове, платим за неё при старте
         return nlp, tokenizer
     except Exception as e:
-        print(f"Ошибка загрузки модели: {e}")
+        logger.exception("Ошибка загрузки модели: %s", e)
         return None, None
 
+
+_nlp_load_lock = threading.Lock()
+
+
+def get_nlp_pipeline():
+    """Возвращает пайплайн классификатора, загружая модель при первом обращении.
+
+    Одновременные вызовы из фоновой загрузки и из обработчика сообщений
+    не загружают модель дважды: второй вызов дожидается первого.
+
+    Returns:
+        Пайплайн text-classification или None, если модель не загрузилась
+    """
+    with _nlp_load_lock:
+        return load_nlp_model()[0]
+
+
+def preload_nlp_model() -> None:
+    """Загружает модель в фоновом потоке, не задерживая запуск бота.
+
+    Бот сразу начинает принимать сообщения; проверка текста, пришедшая
+    до окончания загрузки, дождётся модели в пакетном классификаторе.
+    """
+    threading.Thread(target=get_nlp_pipeline, name="nlp-loader", daemon=True).start()
+
+
 # Инициализация компонентов
-nlp, tokenizer = load_nlp_model()
 vt_client = VirusTotalClient(VIRUSTOTAL_API_KEY)
-analyzer = PhishingAnalyzer(vt_client, nlp, tokenizer)
-bot = telebot.TeleBot(API_TOKEN)
+# модель загружается при первой проверке сообщения, запросы от разных
+# пользователей классифицируются общими пакетами
+analyzer = PhishingAnalyzer(vt_client, BatchClassifier(get_nlp_pipeline, max_length=NLP_MAX_TOKENS),
+                            multilingual=NLP_MULTILINGUAL,
+                            verdict_cache=PersistentCache(".nlp_cache.sqlite3"),
+                            cache_namespace=NLP_CONFIG_KEY,
+                            max_text_chars=NLP_MAX_TOKENS * CHARS_PER_TOKEN)
+# обработчики выполняются в пуле потоков: пока один пользователь ждёт
+# VirusTotal или модель, сообщения остальных продолжают обрабатываться
+bot = telebot.TeleBot(API_TOKEN, threaded=True, num_threads=BOT_THREADS)
 
 
 
+# индикатор «печатает...» отправляется в фоне, не задерживая начало проверки
+_chat_action_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-action")
+
+
+def _send_chat_action(chat_id: int, action: str) -> None:
+    """Отправляет действие в чат; ошибки не мешают ответу пользователю.
+
+    Args:
+        chat_id (int): ID чата
+        action (str): Действие, например "typing"
+    """
+    try:
+        bot.send_chat_action(chat_id, action)
+    except Exception as e:
+        logger.debug("Не удалось отправить действие %s: %s", action, e)
+
+
+def show_typing(chat_id: int) -> None:
+    """Показывает индикатор «печатает...» без ожидания ответа Telegram.
+
+    Args:
+        chat_id (int): ID чата
+    """
+    _chat_action_executor.submit(_send_chat_action, chat_id, "typing")
+
+
 def perform_analysis(message: types.Message, analyzer: BaseAnalyzer):
     """Выполняет анализ сообщения на фишинг и отправляет результат пользователю.
 
+    Пока идёт проверка, пользователь видит индикатор «печатает...».
+
     Args:
         message (types.Message): Объект сообщения от пользователя
         analyzer (BaseAnalyzer): Анализатор для проверки сообщений
     """
+    show_typing(message.chat.id)
     results = analyzer.analyze_message(message.text)
     bot.send_message(message.chat.id, "\n".join(results))
 
 
-def create_main_keyboard():
+def _build_main_keyboard():
     """Создает клавиатуру с основными командами.
 
     Returns:
@@ -94,19 +385,33 @@ def create_main_keyboard():
     return markup
 
 
+# клавиатура и текст справки не меняются, поэтому создаются один раз
+MAIN_KEYBOARD = _build_main_keyboard()
+HELP_TEXT = (
+    "👋 Привет! Я антифишинговый бот.\n\n"
+    "🛡️ Мои возможности:\n"
+    "- Проверка сообщений: Анализирую текст и ссылки на фишинг и вредоносность с помощью NLP и VirusTotal.\n"
+    "- Тест безопасности: Проверь свои знания о цифровых угрозах.\n\n"
+    "👇 Используй кнопки ниже"
+)
+
+
+def create_main_keyboard():
+    """Возвращает клавиатуру с основными командами.
+
+    Returns:
+        types.ReplyKeyboardMarkup: Общий экземпляр клавиатуры с кнопками для проверки сообщения/ссылки и для прохождения теста
+    """  
+    return MAIN_KEYBOARD
+
+
 def get_help_text():
-    """Генерирует текст справки о возможностях бота.
+    """Возвращает текст справки о возможностях бота.
 
     Returns:
         str: Форматированное описание функционала бота
     """ 
-    return (
-        "👋 Привет! Я антифишинговый бот.\n\n"
-        "🛡️ Мои возможности:\n"
-        "- Проверка сообщений: Анализирую текст и ссылки на фишинг и вредоносность с помощью NLP и VirusTotal.\n"
-        "- Тест безопасности: Проверь свои знания о цифровых угрозах.\n\n"
-        "👇 Используй кнопки ниже"
-    )
+    return HELP_TEXT
 
 
 # инициализация теста по безопасности
@@ -114,6 +419,25 @@ user_progress = {}
 init_safety_test_handlers(bot, user_progress, create_main_keyboard)
 
 
+def _load_welcome_photo():
+    """Читает логотип для приветствия с диска.
+
+    Returns:
+        bytes: Содержимое CyberSentry.png или None, если файл не найден
+    """
+    try:
+        with open("CyberSentry.png", "rb") as photo_file:
+            return photo_file.read()
+    except FileNotFoundError:
+        return None
+
+
+# логотип читается с диска один раз; после первой отправки Telegram возвращает
+# file_id, и дальше картинка отправляется по нему без повторной загрузки
+welcome_photo = _load_welcome_photo()
+welcome_photo_id = None
+
+
 @bot.message_handler(commands=["start", "help"])
 def send_welcome(message):
     """Обрабатывает команды /start и /help, отправляет приветственное сообщение.
@@ -125,14 +449,18 @@ def send_welcome(message):
         - Отправляет логотип с описанием функционала
         - В случае ошибки отправляет текстовое описание
     """ 
+    global welcome_photo_id
     try:
-        with open("CyberSentry.png", "rb") as photo_file:
-            bot.send_photo(
-                chat_id=message.chat.id,
-                photo=photo_file,
-                caption=get_help_text(),
-                reply_markup=create_main_keyboard()
-            )
+        if welcome_photo is None:
+            raise FileNotFoundError("CyberSentry.png")
+        sent = bot.send_photo(
+            chat_id=message.chat.id,
+            photo=welcome_photo_id or welcome_photo,
+            caption=get_help_text(),
+            reply_markup=create_main_keyboard()
+        )
+        if welcome_photo_id is None and sent.photo:
+            welcome_photo_id = sent.photo[-1].file_id
     except FileNotFoundError:
         bot.send_message(
             message.chat.id,
@@ -140,7 +468,7 @@ def send_welcome(message):
             reply_markup=create_main_keyboard()
         )
     except Exception as e:
-        print(f"Ошибка при отправке приветствия: {e}")
+        logger.exception("Ошибка при отправке приветствия: %s", e)
         bot.send_message(
             message.chat.id,
             "Произошла ошибка при отображении приветствия.",
@@ -162,10 +490,11 @@ def check_handler(message):
     """
     try:
         text_to_check = message.text.split(None, 1)[1]
+        show_typing(message.chat.id)
         result = analyzer.analyze_message(text_to_check)
         bot.reply_to(message, "\n".join(result), parse_mode="Markdown")
     except IndexError:
-        bot.reply_to(----
+        bot.reply_to(
             message,
             "Пожалуйста, укажите текст для проверки после команды /check"
         )
@@ -201,9 +530,61 @@ def handle_message(message):
         perform_analysis(message, analyzer)
 
 
+def create_webhook_app():
+    """Регистрирует webhook в Telegram и создаёт WSGI-приложение для приёма обновлений.
+
+    Telegram сам отправляет обновления на WEBHOOK_URL, поэтому между ними нет
+    пауз опроса. HTTP-обработчик только передаёт обновление боту, а сами
+    обработчики выполняются в его пуле потоков. Запросы без верного
+    WEBHOOK_SECRET в заголовке отклоняются.
+
+    Встроенный сервер Flask (run_webhook) предназначен для разработки; в продакшене
+    приложение нужно запускать WSGI-сервером в одном процессе, например
+    ``gunicorn --workers 1 --threads 8 'main:create_webhook_app()'``, за обратным
+    прокси с TLS.
+
+    Returns:
+        flask.Flask: Приложение с обработчиком WEBHOOK_PATH
+    """
+    from flask import Flask, abort, request
+
+    app = Flask(__name__)
+    secret = WEBHOOK_SECRET.encode()
+
+    @app.post(WEBHOOK_PATH)
+    def receive_update():
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "").encode()
+        if not hmac.compare_digest(token, secret):
+            abort(403)
+        update = types.Update.de_json(request.get_data(as_text=True))
+        bot.process_new_updates([update])
+        return ""
+
+    bot.remove_webhook()
+    bot.set_webhook(url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH, secret_token=WEBHOOK_SECRET,
+                    allowed_updates=ALLOWED_UPDATES, drop_pending_updates=True)
+    return app
+
+
+def run_webhook() -> None:
+    """Принимает обновления через webhook на встроенном сервере Flask (для разработки)."""
+    create_webhook_app().run(host="0.0.0.0", port=WEBHOOK_PORT, threaded=True)
+
+
 if __name__ == "__main__":
-    print("Бот запущен...")
+    logger.info("Бот запущен...")
+    preload_nlp_model()
     try:
-        bot.polling(none_stop=True)
+        if WEBHOOK_URL:
+            run_webhook()
+        else:
+            # длинный опрос: пока нет сообщений, запрос getUpdates висит до 50 секунд
+            # вместо частых пустых запросов; накопившиеся за время простоя
+            # обновления пропускаются, чтобы после перезапуска сразу отвечать на новые.
+            # infinity_polling перезапускает опрос после сетевых ошибок.
+            # webhook, оставшийся от запуска в режиме webhook, мешал бы getUpdates (409)
+            bot.remove_webhook()
+            bot.infinity_polling(timeout=30, long_polling_timeout=50, skip_pending=True,
+                                 allowed_updates=ALLOWED_UPDATES, interval=0)
     except Exception as e:
-        print(f"Ошибка polling: {e}")
\ No newline at end of file
+        logger.exception("Ошибка polling: %s", e)
\ No newline at end of file
@@ -5,8 +5,12 @@
     - Логику тестирования через Telegram бота
     - Систему оценки результатов
 """
+import time
+import threading
 from telebot import types
 
+PROGRESS_TTL = 1800  # через сколько секунд бездействия незавершённый тест удаляется
+
 SAFETY_QUESTIONS = [
     {
         "question": "Как злоумышленники могут получить ваш пароль, даже если сайт, которым вы пользуетесь, сам не подвергся взлому?",
@@ -98,13 +102,81 @@ SAFETY_QUESTIONS = [
     }
 ]
 
+RECOMMENDATIONS = "\n".join([
+    "1. Используйте уникальные и сложные пароли.",
+    "2. Включайте двухфакторную аутентификацию (2FA).",
+    "3. Проверяйте адреса сайтов и ссылок.",
+    "4. Не скачивайте файлы из непроверенных источников.",
+    "5. Используйте VPN в общественных сетях.",
+    "6. Регулярно обновляйте ПО и системы.",
+    "7. Изучайте фишинг и методы социальной инженерии."
+])
+
+# все варианты ответов: фильтр обработчика проверяет каждое входящее сообщение
+ANSWER_OPTIONS = frozenset(option for q in SAFETY_QUESTIONS for option in q["options"])
+
+
+class TestProgress:
+    """Прогресс пользователя в тесте безопасности.
+
+    Обработчики бота выполняются в пуле потоков, поэтому изменения
+    прогресса одного пользователя выполняются под его блокировкой.
+    asked_question и question_message_id описывают последний отправленный
+    вопрос: ответы на уже пройденные вопросы по ним отбрасываются.
+    """
+    __slots__ = ("current_question", "asked_question", "question_message_id",
+                 "score", "last_touch", "lock")
+
+    def __init__(self):
+        self.current_question = 0
+        self.asked_question = -1
+        self.question_message_id = 0
+        self.score = 0
+        self.last_touch = time.monotonic()
+        self.lock = threading.Lock()
+
+
+def _evict_stale_progress(progress_dict: dict) -> None:
+    """Удаляет тесты, к которым пользователи не возвращались дольше PROGRESS_TTL.
+
+    Args:
+        progress_dict (dict): Словарь прогресса пользователей
+    """
+    deadline = time.monotonic() - PROGRESS_TTL
+    for user_id, progress in list(progress_dict.items()):
+        if progress.last_touch < deadline:
+            progress_dict.pop(user_id, None)
+
+
+def _build_question_markup(question_data: dict) -> types.ReplyKeyboardMarkup:
+    """Создаёт клавиатуру с вариантами ответа на вопрос.
+
+    Args:
+        question_data (dict): Вопрос из SAFETY_QUESTIONS
+
+    Returns:
+        types.ReplyKeyboardMarkup: Клавиатура с кнопкой на каждый вариант
+    """
+    markup = types.ReplyKeyboardMarkup(one_time_keyboard=True, resize_keyboard=True)
+    for option in question_data["options"]:
+        markup.add(types.KeyboardButton(option))
+    return markup
+
+
+# вопросы не меняются, поэтому клавиатуры и тексты собираются один раз при импорте
+QUESTION_MARKUPS = [_build_question_markup(q) for q in SAFETY_QUESTIONS]
+QUESTION_TEXTS = [
+    f"*Вопрос {i + 1} из {len(SAFETY_QUESTIONS)}*\n\n{q['question']}"
+    for i, q in enumerate(SAFETY_QUESTIONS)
+]
+
 
 def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> None:
     """Инициализирует обработчики команд для теста безопасности в Telegram боте.
 
     Args:
         bot_instance (telebot.TeleBot): Экземпляр Telegram бота
-        progress_dict (dict): Словарь для хранения прогресса пользователей
+        progress_dict (dict): Словарь для хранения прогресса пользователей (TestProgress)
         keyboard_func (function): Функция создания основной клавиатуры
     """  
     bot = bot_instance
@@ -121,7 +193,8 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
         user_id = message.from_user.id
         chat_id = message.chat.id
 
-        user_progress[user_id] = {"current_question": 0, "score": 0}
+        _evict_stale_progress(user_progress)
+        user_progress[user_id] = TestProgress()
 
         bot.send_message(
             chat_id,
@@ -137,29 +210,27 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
             chat_id (int): ID чата для отправки сообщения
             user_id (int): ID пользователя для отслеживания прогресса
         """         
-        if user_id not in user_progress:
+        progress = user_progress.get(user_id)
+        if progress is None:
             bot.send_message(chat_id, "Произошла ошибка. Начните тест заново.",
                              reply_markup=create_main_keyboard())
             return
 
-        current_q_index = user_progress[user_id]["current_question"]
+        current_q_index = progress.current_question
 
         if current_q_index >= len(SAFETY_QUESTIONS):
             finalize_test(chat_id, user_id)
             return
 
-        question_data = SAFETY_QUESTIONS[current_q_index]
-
-        markup = types.ReplyKeyboardMarkup(one_time_keyboard=True, resize_keyboard=True)
-        for option in question_data["options"]:
-            markup.add(types.KeyboardButton(option))
-
-        bot.send_message(
+        sent = bot.send_message(
             chat_id,
-            f"*Вопрос {current_q_index + 1} из {len(SAFETY_QUESTIONS)}*\n\n{question_data['question']}",
-            reply_markup=markup,
+            QUESTION_TEXTS[current_q_index],
+            reply_markup=QUESTION_MARKUPS[current_q_index],
             parse_mode="Markdown"
         )
+        with progress.lock:
+            progress.asked_question = current_q_index
+            progress.question_message_id = sent.message_id
 
     @bot.message_handler(func=lambda msg: is_answer(msg.text))
     def handle_text_answer(message):
@@ -171,19 +242,32 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
         user_id = message.from_user.id
         chat_id = message.chat.id
 
-        if user_id not in user_progress:
+        progress = user_progress.get(user_id)
+        if progress is None:
             bot.send_message(chat_id, "Тест не найден. Возможно, он уже завершён.",
                              reply_markup=create_main_keyboard())
             return
 
-        current_q_index = user_progress[user_id]["current_question"]
-        question_data = SAFETY_QUESTIONS[current_q_index]
-
-        try:
-            selected_index = question_data["options"].index(message.text.strip())
-        except ValueError:
-            bot.send_message(chat_id, "Пожалуйста, выберите ответ, используя кнопки ниже.")
-            return
+        # повторное нажатие кнопки не должно засчитать вопрос дважды или
+        # засчитаться ответом на следующий: ответ принимается, только если он
+        # отправлен после текущего вопроса и входит в его варианты, остальное
+        # молча отбрасывается
+        with progress.lock:
+            current_q_index = progress.current_question
+            if (current_q_index >= len(SAFETY_QUESTIONS)
+                    or progress.asked_question != current_q_index
+                    or message.message_id < progress.question_message_id):
+                return
+            question_data = SAFETY_QUESTIONS[current_q_index]
+
+            try:
+                selected_index = question_data["options"].index(message.text.strip())
+            except ValueError:
+                return
+            if selected_index == question_data["correct"]:
+                progress.score += 1
+            progress.current_question += 1
+            progress.last_touch = time.monotonic()
 
         correct_index = question_data["correct"]
         is_correct = selected_index == correct_index
@@ -193,9 +277,6 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
         )
         explanation = question_data["explanation"]
 
-        if is_correct:
-            user_progress[user_id]["score"] += 1
-
         bot.send_message(
             chat_id,
             f"{response}\n\n📚 Пояснение: {explanation}",
@@ -203,7 +284,6 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
             reply_markup=types.ReplyKeyboardRemove()
         )
 
-        user_progress[user_id]["current_question"] += 1
         ask_question(chat_id, user_id)
 
     def is_answer(text: str) -> bool:
@@ -215,7 +295,7 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
         Returns:
             bool: True если текст совпадает с любым вариантом ответа, иначе False
         """     
-        return any(text == option for q in SAFETY_QUESTIONS for option in q["options"])
+        return text in ANSWER_OPTIONS
 
     def finalize_test(chat_id: int, user_id: int) -> None:
         """Завершает тест и выводит результаты пользователю.
@@ -224,10 +304,11 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
             chat_id (int): ID чата для отправки результатов
             user_id (int): ID пользователя для получения результатов
         """           
-        if user_id not in user_progress:
+        progress = user_progress.pop(user_id, None)
+        if progress is None:
             return
 
-        score = user_progress[user_id]["score"]
+        score = progress.score
         total = len(SAFETY_QUESTIONS)
         percentage = (score / total) * 100
 
@@ -240,23 +321,11 @@ def init_safety_test_handlers(bot_instance, progress_dict, keyboard_func) -> Non
         else:
             feedback = f"😥 Низкий результат ({percentage:.0f}%). Рекомендую изучить материалы по цифровой безопасности."
 
-        recommendations = "\n".join([
-            "1. Используйте уникальные и сложные пароли.",
-            "2. Включайте двухфакторную аутентификацию (2FA).",
-            "3. Проверяйте адреса сайтов и ссылок.",
-            "4. Не скачивайте файлы из непроверенных источников.",
-            "5. Используйте VPN в общественных сетях.",
-            "6. Регулярно обновляйте ПО и системы.",
-            "7. Изучайте фишинг и методы социальной инженерии."
-        ])
-
         bot.send_message(
             chat_id,
             f"🏁 Тест завершён!\n\nПравильных ответов: {score} из {total}\n\n"
-            f"{feedback}\n\n📌 Рекомендации:\n{recommendations}\n\n"
+            f"{feedback}\n\n📌 Рекомендации:\n{RECOMMENDATIONS}\n\n"
             "🔐 *Узнайте больше об онлайн-безопасности на сайтах Kaspersky, ESET и других.*",
             parse_mode="Markdown",
             reply_markup=create_main_keyboard()
-        )
-
-        user_progress.pop(user_id, None)
\ No newline at end of file
+        )
\ No newline at end of file
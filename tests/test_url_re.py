@@ -0,0 +1,47 @@
+"""Регрессионные проверки шаблона поиска URL (analyzers.URL_RE)."""
+import re
+import time
+
+import pytest
+
+for _module in ('requests', 'tldextract', 'torch', 'transformers'):
+    pytest.importorskip(_module)
+
+import analyzers  # noqa: E402
+
+# текст сообщения -> ссылки, которые должны быть найдены
+URL_CASES = [
+    ('Зайдите на evil.com/login\xa0и введите пароль', ['evil.com/login']),
+    ('evil.com/a\u2003b', ['evil.com/a']),
+    ('evil.com/a\u2028b', ['evil.com/a']),
+    ('evil.com/a\u202fb', ['evil.com/a']),
+    ('жмиbit.ly/abc', ['bit.ly/abc']),
+    ('Перейдитеevil-bank.com/login', ['evil-bank.com/login']),
+    ('Откройте https://bit.ly/abc срочно', ['https://bit.ly/abc']),
+    ('Сайт www.example.com/x?y=1 работает', ['www.example.com/x?y=1']),
+    ('Пишите на support@bank-secure.org', ['bank-secure.org']),
+    ('ftp://files.example.net/a.zip', ['ftp://files.example.net/a.zip']),
+    ('Привет, как дела?', []),
+]
+
+BASE64_BLOB = 'aGVsbG8' * 6000  # 42 000 символов без точек и пробелов
+
+
+@pytest.mark.parametrize('text, expected', URL_CASES)
+def test_url_re_finds_links(text, expected):
+    assert analyzers.URL_RE.findall(text) == expected
+
+
+def test_url_re_linear_on_long_tokens():
+    # без привязки начала совпадения время было бы квадратичным (секунды)
+    start = time.perf_counter()
+    assert analyzers.URL_RE.findall(BASE64_BLOB) == []
+    assert time.perf_counter() - start < 0.1
+
+
+@pytest.mark.parametrize('text, expected', URL_CASES)
+def test_stdlib_and_re2_agree(text, expected):
+    re2 = pytest.importorskip('re2')
+    stdlib_re = re.compile(analyzers._URL_START_RE + analyzers._URL_BODY)
+    re2_re = re2.compile(analyzers._URL_START_RE2 + analyzers._URL_BODY)
+    assert stdlib_re.findall(text) == re2_re.findall(text) == expected